@@ -32,10 +32,14 @@ echo "Max file size   : ${maxFileSize}"
 echo "Number of units : ${numUnits}"
 
 PLOT_SPEED_URL="https://raw.githubusercontent.com/CryptoZanoryt/spacemesh/main/plot-speed/smesher-plot-speed.py"
+PLOT_SPEED_LIB_URL="https://raw.githubusercontent.com/CryptoZanoryt/spacemesh/main/plot-speed/smesher_plot_speed.py"
+PLOT_SPEED_DASHBOARD_URL="https://raw.githubusercontent.com/CryptoZanoryt/spacemesh/main/plot-speed/smesher_plot_dashboard.py"
 POSTCLI_VERSION="0.8.11"
 POSTCLI_PATH="/tmp/postcli"
 POSTCLI_FULLPATH="${POSTCLI_PATH}/postcli"
 PLOT_SPEED_FULLPATH="/tmp/smesher-plot-speed.py"
+PLOT_SPEED_LIB_FULLPATH="/tmp/smesher_plot_speed.py"
+PLOT_SPEED_DASHBOARD_FULLPATH="/tmp/smesher_plot_dashboard.py"
 POST_DATA_PATH="/tmp/post-data"
 
 # Update system and install dependencies
@@ -50,6 +54,8 @@ rm postcli-Linux.zip
 chmod +x $POSTCLI_FULLPATH
 
 wget -O $PLOT_SPEED_FULLPATH $PLOT_SPEED_URL
+wget -O $PLOT_SPEED_LIB_FULLPATH $PLOT_SPEED_LIB_URL
+wget -O $PLOT_SPEED_DASHBOARD_FULLPATH $PLOT_SPEED_DASHBOARD_URL
 
 rm -rf $POST_DATA_PATH
 mkdir -p $POST_DATA_PATH
@@ -62,8 +68,12 @@ echo "Number of files : ${numFiles}"
 echo "Files per GPU   : ${numFilesPerGpu}"
 
 echo "Initializing tmux"
-tmux new-session -d -s post -n smesher-plot-speed
-tmux send-keys -t post "watch -n 5 python3 $PLOT_SPEED_FULLPATH ${POST_DATA_PATH} --report" Enter
+tmux new-session -d -s post -n dashboard
+# postcli writes postdata_metadata.json once it starts, which the dashboard needs
+tmux send-keys -t post:dashboard "until [ -f ${POST_DATA_PATH}/postdata_metadata.json ]; do sleep 5; done; python3 $PLOT_SPEED_FULLPATH --dashboard --watch 5 ${POST_DATA_PATH}" Enter
+# Reports are sent from their own window every 10 minutes; the dashboard never reports
+tmux new-window -t post -n report
+tmux send-keys -t post:report "while true; do python3 $PLOT_SPEED_FULLPATH ${POST_DATA_PATH} --report; sleep 600; done" Enter
 tmux new-window -t post -n nvtop
 tmux send-keys -t post:nvtop "nvtop" Enter
 tmux new-window -t post -n htop
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+#
+# smesher_plot_dashboard.py
+#
+# Live curses dashboard for many PoST directories, used by
+# `smesher-plot-speed.py --dashboard`. A background thread refreshes every
+# PlotScanner and publishes immutable rows while a second one delivers event
+# hooks; the screen only rewrites the cells whose text changed since the
+# previous frame.
+#
+# Author: Zanoryt <zanoryt@protonmail.com>
+#
+
+import collections
+import curses
+import datetime
+import locale
+import queue
+import threading
+import time
+
+from smesher_plot_speed import PlotScanError, format_duration, provider_event
+
+sparkline_unicode = " ▁▂▃▄▅▆▇█"
+sparkline_ascii = " .:-=+*#%@"
+history_length = 60
+hook_queue_length = 1000
+min_cell_width = 12
+unflagged_states = ('OK', 'DONE', 'NOT STARTED')
+
+DashboardRow = collections.namedtuple('DashboardRow', [
+  'directory', 'provider', 'fraction', 'rate_MiBps', 'history', 'etf_seconds', 'status'
+])
+
+
+def provider_row(scanner, status, history):
+  fraction = min(status.bytes / status.expected_bytes, 1) if status.expected_bytes else 0
+  etf_seconds = None
+  if not status.complete and status.rate_MiBps:
+    etf_seconds = (status.expected_bytes - status.bytes) / (status.rate_MiBps * 1024 * 1024)
+  if not status.started:
+    state = 'NOT STARTED'
+  elif status.complete:
+    state = 'DONE'
+  elif status.flags:
+    state = ','.join(sorted(status.flags)).upper()
+  else:
+    state = 'OK'
+  return DashboardRow(scanner.directory, status.provider, fraction, status.rate_MiBps, tuple(history), etf_seconds, state)
+
+
+class HookDispatcher(threading.Thread):
+  # Delivers hook events off the sampling thread, so a slow command or an unresponsive
+  # URL (each post may block for its full timeout) never delays the next sample
+
+  def __init__(self, hooks):
+    super().__init__(daemon=True)
+    self.hooks = hooks
+    self._queue = queue.Queue(maxsize=hook_queue_length)
+    self._errors = collections.deque(maxlen=history_length)
+    self._lock = threading.Lock()
+
+  def submit(self, data):
+    try:
+      self._queue.put_nowait(data)
+    except queue.Full:
+      self.add_error(f"Hook queue full, dropped {data['event']} for {data['directory']} provider {data['provider']}")
+
+  def add_error(self, message):
+    with self._lock:
+      self._errors.append(message)
+
+  def take_errors(self):
+    with self._lock:
+      errors = tuple(self._errors)
+      self._errors.clear()
+      return errors
+
+  def run(self):
+    while True:
+      data = self._queue.get()
+      try:
+        self.hooks.deliver(data)
+      except Exception as error:
+        self.add_error(str(error))
+
+
+class DashboardSampler(threading.Thread):
+
+  def __init__(self, scanners, interval, hooks=None, skipped=()):
+    super().__init__(daemon=True)
+    self.scanners = scanners
+    self.interval = interval
+    self.dispatcher = None if hooks is None else HookDispatcher(hooks)
+    self.skipped = tuple(skipped)
+    self.rows = ()
+    self.errors = ()
+    self.sampled_at = None
+    self.generation = 0
+    self._histories = {}
+    self._lock = threading.Lock()
+    self._stopped = threading.Event()
+
+  def start(self):
+    if self.dispatcher is not None:
+      self.dispatcher.start()
+    super().start()
+
+  def stop(self):
+    self._stopped.set()
+
+  def snapshot(self):
+    with self._lock:
+      return self.generation, self.sampled_at, self.rows, self.errors
+
+  def run(self):
+    while not self._stopped.is_set():
+      started = time.monotonic()
+      try:
+        self.sample()
+      except Exception as error:
+        # Keep sampling and surface the failure in the footer instead of silently freezing the screen
+        with self._lock:
+          self.errors = (f"Sampling failed: {error!r}",) + self.skipped
+          self.generation += 1
+      self._stopped.wait(max(0, self.interval - (time.monotonic() - started)))
+
+  def sample(self):
+    now = time.time()
+    rows = []
+    errors = []
+    for scanner in self.scanners:
+      try:
+        progress = scanner.refresh(now)
+      except (OSError, PlotScanError) as error:
+        errors.append(f"{scanner.directory}: {error}")
+        continue
+      if self.dispatcher is not None:
+        for status, event in progress.events:
+          # Debounce and build the payload now so it reflects this sample, then hand it off
+          if self.dispatcher.hooks.should_fire(scanner, status, event, now):
+            self.dispatcher.submit(provider_event(scanner, status, event, now))
+      for status in progress.providers:
+        key = (scanner.directory, status.provider)
+        history = self._histories.get(key)
+        if history is None:
+          history = self._histories[key] = collections.deque(maxlen=history_length)
+        if status.rate_MiBps is not None:
+          history.append(status.rate_MiBps)
+        rows.append(provider_row(scanner, status, history))
+    if self.dispatcher is not None:
+      errors.extend(self.dispatcher.take_errors())
+    with self._lock:
+      self.rows = tuple(rows)
+      self.errors = tuple(errors) + self.skipped
+      self.sampled_at = now
+      self.generation += 1
+
+
+class Dashboard:
+
+  def __init__(self, stdscr, sampler):
+    self.stdscr = stdscr
+    self.sampler = sampler
+    self.offset = 0
+    self.generation = None
+    self.cells = {}
+    self.sparkline = sparkline_unicode if locale.getpreferredencoding().lower().replace('-', '') == 'utf8' else sparkline_ascii
+
+  def run(self):
+    curses.curs_set(0)
+    self.stdscr.timeout(250)
+    while True:
+      key = self.stdscr.getch()
+      if key in (ord('q'), ord('Q'), 27):
+        return
+      if key == curses.KEY_RESIZE:
+        self.stdscr.erase()
+        self.cells = {}
+        self.generation = None
+      elif key in (curses.KEY_DOWN, ord('j')):
+        self.scroll(1)
+      elif key in (curses.KEY_UP, ord('k')):
+        self.scroll(-1)
+      elif key == curses.KEY_NPAGE:
+        self.scroll(self.page_size())
+      elif key == curses.KEY_PPAGE:
+        self.scroll(-self.page_size())
+      generation, sampled_at, rows, errors = self.sampler.snapshot()
+      if generation != self.generation:
+        self.generation = generation
+        self.draw(sampled_at, rows, errors)
+
+  def page_size(self):
+    return max(self.stdscr.getmaxyx()[0] - 3, 1)
+
+  def scroll(self, lines):
+    self.offset = max(0, self.offset + lines)
+    # Force a redraw of the new window into the rows
+    self.generation = None
+
+  def draw(self, sampled_at, rows, errors):
+    height, width = self.stdscr.getmaxyx()
+    page_size = self.page_size()
+    self.offset = min(self.offset, max(len(rows) - page_size, 0))
+
+    total_rate = sum(row.rate_MiBps or 0 for row in rows)
+    flagged = sum(1 for row in rows if row.status not in unflagged_states)
+    directories = len(set(row.directory for row in rows))
+    when = datetime.datetime.fromtimestamp(sampled_at).strftime('%H:%M:%S') if sampled_at else '--:--:--'
+    self.put(0, 0, f"{when}  {directories} directories, {len(rows)} providers, {total_rate:.2f} MiB/s total, {flagged} flagged", width, curses.A_BOLD)
+
+    directory_width, progress_width, spark_width = self.column_widths(width)
+    widths = (directory_width, 2, progress_width, 8, spark_width, 15, 11)
+    self.put_cells(1, ('Directory', 'P', 'Progress', 'MiB/s', 'History', 'ETA', 'Status'), widths, width, curses.A_UNDERLINE)
+
+    for line in range(page_size):
+      index = self.offset + line
+      if index < len(rows):
+        row = rows[index]
+        attribute = curses.A_NORMAL if row.status in unflagged_states else curses.A_REVERSE
+        self.put_cells(2 + line, self.format_row(row, directory_width, progress_width, spark_width), widths, width, attribute)
+      else:
+        self.put_cells(2 + line, ('',) * len(widths), widths, width, curses.A_NORMAL)
+
+    footer = errors[0] if errors else f"q quit, arrows/PgUp/PgDn scroll ({min(self.offset + 1, len(rows))}-{min(self.offset + page_size, len(rows))} of {len(rows)})"
+    self.put(height - 1, 0, footer, width, curses.A_DIM)
+    self.stdscr.noutrefresh()
+    curses.doupdate()
+
+  def column_widths(self, width):
+    # The fixed columns, separators and the unused last screen column take 44 cells. The
+    # sparkline, directory and progress bar each get a minimum before any of them grows,
+    # so an 80 column terminal (or a fresh detached tmux window) still shows the history.
+    budget = max(width - 44, 0)
+    spark_width = min(min_cell_width, budget)
+    budget -= spark_width
+    directory_width = min(min_cell_width, budget)
+    budget -= directory_width
+    progress_width = min(min_cell_width, budget)
+    budget -= progress_width
+    grow = min(29 - progress_width, budget)
+    progress_width += grow
+    budget -= grow
+    grow = min(40 - directory_width, budget)
+    directory_width += grow
+    budget -= grow
+    spark_width += min(history_length - spark_width, budget)
+    return directory_width, progress_width, spark_width
+
+  def format_row(self, row, directory_width, progress_width, spark_width):
+    directory = row.directory if len(row.directory) <= directory_width else '...' + row.directory[-(directory_width - 3):]
+    # "[" bar "] " and a "100.0%" percentage take 9 cells around the bar
+    bar_width = max(progress_width - 9, 0)
+    filled = int(row.fraction * bar_width)
+    bar = f"[{'#' * filled}{'.' * (bar_width - filled)}] {row.fraction * 100:5.1f}%"
+    rate = f"{row.rate_MiBps:8.2f}" if row.rate_MiBps is not None else f"{'-':>8}"
+    etf = format_duration(row.etf_seconds) if row.etf_seconds is not None else '-'
+    return (directory, f"{row.provider:>2}", bar, rate, self.format_sparkline(row.history, spark_width), f"{etf:>15}", row.status)
+
+  def format_sparkline(self, history, spark_width):
+    if not spark_width or not history:
+      return ''
+    values = list(history)[-spark_width:]
+    peak = max(values)
+    if not peak:
+      return self.sparkline[0] * len(values)
+    steps = len(self.sparkline) - 1
+    return ''.join(self.sparkline[round(value / peak * steps)] for value in values)
+
+  def put_cells(self, y, texts, widths, width, attribute):
+    x = 0
+    for text, cell_width in zip(texts, widths):
+      if cell_width:
+        # Each cell owns its trailing separator so highlighted rows stay contiguous
+        self.put(y, x, text, width, attribute, cell_width + 1)
+        x += cell_width + 1
+
+  def put(self, y, x, text, width, attribute=curses.A_NORMAL, cell_width=None):
+    # Only cells whose text or attribute changed since the last frame reach curses;
+    # the last screen column is never written so addstr cannot run off the line
+    available = width - x - 1
+    cell_width = available if cell_width is None else min(cell_width, available)
+    if cell_width <= 0:
+      return
+    text = text[:cell_width].ljust(cell_width)
+    if self.cells.get((y, x)) == (text, attribute):
+      return
+    self.cells[(y, x)] = (text, attribute)
+    try:
+      self.stdscr.addstr(y, x, text, attribute)
+    except curses.error:
+      pass
+
+
+def run_dashboard(scanners, interval, hooks=None, skipped=()):
+  locale.setlocale(locale.LC_ALL, '')
+  sampler = DashboardSampler(scanners, interval, hooks, skipped)
+  sampler.start()
+  try:
+    curses.wrapper(lambda stdscr: Dashboard(stdscr, sampler).run())
+  except KeyboardInterrupt:
+    pass
+  finally:
+    sampler.stop()
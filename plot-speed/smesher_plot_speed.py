@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+#
+# smesher_plot_speed.py
+#
+# Library behind smesher-plot-speed.py. Import it to monitor one or many PoST
+# directories from a long-lived process without spawning the CLI:
+#
+#   from smesher_plot_speed import PlotScanner
+#
+#   scanner = PlotScanner('/path/to/post-data', num_providers=2)
+#   progress = scanner.refresh()
+#   print(progress.progress_percent, progress.recent_throughput_MiBps)
+#
+# Author: Zanoryt <zanoryt@protonmail.com>
+#
+
+import base64
+import bisect
+import collections
+import datetime
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+version = "1.3.0"
+github_url = "https://github.com/CryptoZanoryt/spacemesh/tree/main/plot-speed"
+report_url = "https://reports.smesh.cloud/api/reports/receive"
+
+GiB = 1024**3
+MiB = 1024**2
+postdata_bin_pattern = re.compile(r"postdata_(\d+)\.bin$")
+
+
+class PlotScanError(Exception):
+  pass
+
+
+def detect_cpu():
+  cpu = { 'name': '', 'type': '' }
+  if platform.system() == "Windows":
+    cpu = {
+      'name': platform.processor(),
+      'type': platform.processor()
+    }
+  elif platform.system() == "Darwin":
+    os.environ['PATH'] = os.environ['PATH'] + os.pathsep + '/usr/sbin'
+    command = ["sysctl", "-n", "machdep.cpu.brand_string"]
+    output = subprocess.check_output(command).decode().strip()
+    cpu = {
+      'name': output,
+      'type': output
+    }
+  elif platform.system() == "Linux":
+    command = "cat /proc/cpuinfo"
+    all_info = subprocess.check_output(command, shell=True).decode().strip()
+    for line in all_info.split("\n"):
+      if "model name" in line:
+        cpu = {
+          'name': re.sub( ".*model name.*: ", "", line, 1),
+          'type': re.sub( ".*model name.*: ", "", line, 1)
+        }
+  return cpu
+
+def detect_gpus():
+  gpu_info = []
+  if platform.system() == 'Linux':
+    gpu_info.extend(detect_linux_gpus())
+  elif platform.system() == 'Windows':
+    gpu_info.extend(detect_windows_gpus())
+  elif platform.system() == 'Darwin':
+    gpu_info.extend(detect_macos_gpus())
+  return gpu_info
+
+def detect_linux_gpus():
+  gpu_info = []
+  nvidia_gpus = detect_nvidia_gpus()
+  amd_gpus = detect_amd_gpus()
+  intel_gpus = detect_intel_gpus()
+  gpu_info.extend(nvidia_gpus)
+  gpu_info.extend(amd_gpus)
+  gpu_info.extend(intel_gpus)
+  return gpu_info
+
+def detect_nvidia_gpus():
+  gpu_info = []
+  command = 'nvidia-smi --query-gpu=gpu_name --format=csv,noheader 2>/dev/null'
+  try:
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_names = output.split('\n')
+    for gpu_name in gpu_names:
+      name = 'NVIDIA ' + gpu_name
+      gpu_info.append({'vendor': 'NVIDIA', 'model': gpu_name, 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_amd_gpus():
+  gpu_info = []
+  command = 'rocm-smi --showproductname 2>/dev/null'
+  try:
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_names = output.split('\n')
+    for gpu_name in gpu_names:
+      name = 'AMD ' + gpu_name
+      gpu_info.append({'vendor': 'AMD', 'model': gpu_name, 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_intel_gpus():
+  gpu_info = []
+  try:
+    command = 'update-pciids 2>/dev/null'
+    subprocess.check_output(command, shell=True)
+    command = 'lspci -mm -n -d ::0300 2>/dev/null | awk -F " " \'{print $3":"$4}\''
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    device_ids = output.split('\n')
+    for device_id in device_ids:
+      vendor_id, model_id = device_id.split(':')
+      if vendor_id == '8086':  # Intel vendor ID
+        model_name = detect_intel_model_name(vendor_id, model_id)
+        if model_name:
+          name = 'Intel ' + model_name
+          gpu_info.append({'vendor': 'Intel', 'model': model_name, 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_intel_model_name(vendor_id, model_id):
+  try:
+    command = f'lspci -mm -n -s ::{vendor_id}:{model_id} -vnn 2>/dev/null | grep "Device" | awk -F ":" \'{{print $2}}\''
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    model_name = output.split(' [')[0].replace('"', '')
+    return model_name
+  except subprocess.CalledProcessError:
+    return None
+
+def detect_intel_gpus_alt():
+  gpu_info = []
+  try:
+    command = 'lshw -C display -json 2>/dev/null'
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_data = json.loads(output)['displays']
+    for gpu in gpu_data:
+      if gpu['vendor'] == 'Intel':
+        model_name = gpu['product']
+        name = 'Intel ' + model_name
+        gpu_info.append({'vendor': 'Intel', 'model': model_name, 'name': name})
+  except (subprocess.CalledProcessError, KeyError, json.JSONDecodeError):
+    gpu_info.extend(detect_intel_gpus_dmidecode())
+  return gpu_info
+
+def detect_intel_gpus_dmidecode():
+  gpu_info = []
+  try:
+    command = 'dmidecode -t 3 | grep "VGA" -A 5 | grep "Product Name" | awk -F ": " \'{print $2}\''
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_names = output.split('\n')
+    for gpu_name in gpu_names:
+      name = 'Intel ' + gpu_name.strip()
+      gpu_info.append({'vendor': 'Intel', 'model': gpu_name.strip(), 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_windows_gpus():
+  gpu_info = []
+  command = 'wmic PATH Win32_VideoController GET Name'
+  try:
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_names = output.split('\n')[1:]
+    for gpu_name in gpu_names:
+      name = 'NVIDIA ' + gpu_name.strip()
+      gpu_info.append({'vendor': 'NVIDIA', 'model': gpu_name.strip(), 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_macos_gpus():
+  gpu_info = []
+  command = '/usr/sbin/system_profiler SPDisplaysDataType | awk -F": " \'/^\\s*Chipset Model:/ {print $2}\''
+  try:
+    output = subprocess.check_output(command, shell=True).decode().strip()
+    gpu_names = output.split('\n')
+    for gpu_name in gpu_names:
+      name = 'AMD ' + gpu_name.strip()
+      gpu_info.append({'vendor': 'AMD', 'model': gpu_name.strip(), 'name': name})
+  except subprocess.CalledProcessError:
+    pass
+  return gpu_info
+
+def detect_linux_distribution():
+  with open('/etc/os-release', 'r') as f:
+    lines = f.readlines()
+  dist_info = {}
+  for line in lines:
+    if '=' in line:
+      key, value = line.strip().split('=')
+      dist_info[key] = value.strip('"')
+
+  dist_name = dist_info.get('PRETTY_NAME', '')
+  dist_version = dist_info.get('VERSION_ID', '')
+  dist_id = dist_info.get('ID', '').capitalize()
+  return dist_name, dist_version, dist_id
+
+
+def detect_os():
+  operating_system = { 'system': None, 'version': None }
+  if platform.system() == 'Linux':
+    distro_name, distro_version, distro_id = detect_linux_distribution()
+    operating_system = {
+      'system': platform.system(),
+      'distribution': distro_id,
+      'version': distro_version,
+      'name': f"{distro_id} {platform.system()} {distro_version}"
+    }
+  if platform.system() == 'Darwin' and hasattr(platform, 'mac_ver'):
+    operating_system = {
+      'system': 'macOS',
+      'version': platform.mac_ver()[0],
+      'name': f"macOS {platform.mac_ver()[0]}"
+    }
+  if platform.system() == 'Windows' and hasattr(platform, 'win32_ver'):
+    operating_system = {
+      'system': 'Windows',
+      'release': platform.win32_ver()[0],
+      'version': platform.win32_ver()[1],
+      'service_pack': platform.win32_ver()[2],
+      'processor_support': platform.win32_ver()[3],
+      'edition': platform.win32_edition(),
+      'name': f"Windows {platform.win32_ver()[0]}"
+    }
+  return operating_system
+
+def detect_provider(gpus, force_cpu=False, force_gpu=False):
+  if force_cpu:
+    return 'CPU'
+  if force_gpu:
+    return 'GPU'
+  if any(gpu['vendor'] == 'NVIDIA' for gpu in gpus):
+    return 'GPU'
+  if any(gpu['vendor'] == 'AMD' for gpu in gpus):
+    return 'GPU'
+  return 'CPU'
+
+def postdata_metadata(directory):
+  path = os.path.join(directory, "postdata_metadata.json")
+  try:
+    with open(path, "r") as file:
+        json_data = file.read()
+    data = json.loads(json_data)
+    node_id = base64.b64decode(data['NodeId']).hex()
+    num_units = int(data['NumUnits'])
+    max_file_size = int(data['MaxFileSize'])
+  # json.JSONDecodeError and binascii.Error are both ValueErrors
+  except (OSError, ValueError, KeyError, TypeError) as error:
+    raise PlotScanError(f"The {path} file is missing, incomplete or invalid: {error!r}")
+  if max_file_size <= 0:
+    raise PlotScanError(f"The {path} file has an invalid MaxFileSize: {max_file_size}")
+  node_md5 = hashlib.md5(node_id.encode()).hexdigest()  # We do this for privacy reasons!
+  return {
+    'node_md5': node_md5,
+    'num_units': num_units,
+    'max_file_size': max_file_size,
+    'gb_size': GiB,
+    'total_post_size_GiB': num_units * 64
+  }
+
+def postdata_bin_files(directory):
+  return [file for file in os.listdir(directory) if postdata_bin_pattern.match(file)]
+
+def provider_file_ranges(postdata, num_providers):
+  # Same whole-file split as generate-post.sh; the last provider also takes any remainder
+  num_files = postdata['total_post_size_GiB'] * GiB // postdata['max_file_size']
+  files_per_provider = max(num_files // num_providers, 1)
+  ranges = [(files_per_provider * i, files_per_provider * (i + 1) - 1) for i in range(num_providers)]
+  ranges[-1] = (ranges[-1][0], max(ranges[-1][1], num_files - 1))
+  return ranges
+
+def parse_file_ranges(value):
+  ranges = []
+  for part in value.split(','):
+    from_file, separator, to_file = part.strip().partition('-')
+    if not separator or not from_file.isdigit() or not to_file.isdigit() or int(from_file) > int(to_file):
+      raise PlotScanError(f"Invalid file range '{part}', expected <from>-<to> such as 0-15")
+    ranges.append((int(from_file), int(to_file)))
+  ranges.sort()
+  for previous, current in zip(ranges, ranges[1:]):
+    if current[0] <= previous[1]:
+      raise PlotScanError(f"File ranges {previous[0]}-{previous[1]} and {current[0]}-{current[1]} overlap")
+  return ranges
+
+def format_duration(seconds):
+  days, remainder = divmod(seconds, 86400)    # 86400 seconds in a day
+  hours, remainder = divmod(remainder, 3600)  # 3600 seconds in an hour
+  minutes, seconds = divmod(remainder, 60)
+  return f"{int(days):02d}d {int(hours):02d}h {int(minutes):02d}m {int(seconds):02d}s"
+
+def format_minutes_seconds(seconds):
+  minutes, seconds = divmod(seconds, 60)
+  return f"{int(minutes):02d}m {int(seconds):02d}s"
+
+
+class PostFile:
+  __slots__ = ('path', 'size', 'mtime', 'inode')
+
+  def __init__(self, path, size, mtime, inode=None):
+    self.path = path
+    self.size = size
+    self.mtime = mtime
+    self.inode = inode
+
+  def to_dict(self, now):
+    return { 'path': self.path, 'size': self.size, 'time_since_modified': abs(now - self.mtime) }
+
+
+class ProviderStatus:
+  __slots__ = (
+    'provider', 'from_file', 'to_file', 'expected_bytes', 'bytes', 'current_file', 'complete',
+    'started', 'last_growth_time', 'seconds_since_growth', 'rate_MiBps', 'baseline_MiBps', 'flags', 'samples'
+  )
+
+  def __init__(self, provider, file_range, max_file_size):
+    self.provider = provider
+    self.from_file, self.to_file = file_range
+    self.expected_bytes = (self.to_file - self.from_file + 1) * max_file_size
+    self.bytes = None
+    self.current_file = None
+    self.complete = False
+    self.started = False
+    self.last_growth_time = None
+    self.seconds_since_growth = None
+    self.rate_MiBps = None
+    self.baseline_MiBps = None
+    self.flags = frozenset()
+    self.samples = collections.deque()
+
+  def update(self, post_files, now, stall_seconds, throttle_percent, rate_window_seconds):
+    previously_sampled = self.bytes is not None
+    was_complete = self.complete
+    total_bytes = 0
+    current = None
+    for post_file in post_files:
+      total_bytes += post_file.size
+      if current is None or post_file.mtime > current.mtime:
+        current = post_file
+
+    # A provider with no file in its range yet has not started (or there is no postcli
+    # instance for it), which must not be reported as a stall
+    self.started = current is not None
+    if not self.started:
+      self.last_growth_time = None
+    elif self.last_growth_time is None:
+      # The newest file's mtime is the last time this provider wrote anything
+      self.last_growth_time = current.mtime
+    elif total_bytes > self.bytes:
+      self.last_growth_time = now
+    if self.bytes is not None and total_bytes < self.bytes:
+      # Files shrank, so this is a new plot: restart the rate window rather than report a negative rate
+      self.samples.clear()
+      self.rate_MiBps = None
+    self.bytes = total_bytes
+    self.current_file = current.path if current is not None else None
+
+    samples = self.samples
+    samples.append((now, total_bytes))
+    # Keep one sample at or beyond the window edge so a full window spans at least rate_window_seconds
+    while len(samples) > 2 and now - samples[1][0] >= rate_window_seconds:
+      samples.popleft()
+    span = samples[-1][0] - samples[0][0]
+    window_full = span >= rate_window_seconds
+    if span > 0:
+      self.rate_MiBps = (samples[-1][1] - samples[0][1]) / span / MiB
+
+    flags = set()
+    self.complete = total_bytes >= self.expected_bytes
+    self.seconds_since_growth = now - self.last_growth_time if self.started else None
+    if not self.started or self.complete:
+      pass
+    elif self.seconds_since_growth >= stall_seconds:
+      flags.add('stall')
+    elif window_full and self.baseline_MiBps:
+      if self.rate_MiBps < self.baseline_MiBps * throttle_percent / 100:
+        flags.add('throttle')
+
+    # Throttled or stalled windows must not drag the baseline down with them
+    if window_full and not flags and not self.complete and self.rate_MiBps > 0:
+      if self.baseline_MiBps is None:
+        self.baseline_MiBps = self.rate_MiBps
+      else:
+        self.baseline_MiBps += 0.05 * (self.rate_MiBps - self.baseline_MiBps)
+
+    events = sorted(flags)
+    if self.complete and not was_complete and previously_sampled:
+      events.append('complete')
+    elif self.flags and not flags and not self.complete:
+      events.append('recover')
+    self.flags = frozenset(flags)
+    return events
+
+  def to_dict(self):
+    return {
+      'provider': self.provider,
+      'current_file': self.current_file,
+      'bytes': self.bytes,
+      'complete': self.complete,
+      'started': self.started,
+      'seconds_since_growth': self.seconds_since_growth,
+      'rate_MiBps': self.rate_MiBps,
+      'baseline_MiBps': self.baseline_MiBps,
+      'flags': sorted(self.flags)
+    }
+
+
+class PlotProgress:
+  __slots__ = (
+    'directory', 'postdata', 'sampled_at', 'ready', 'complete', 'current_post_size_GiB',
+    'remaining_post_size_GiB', 'progress_percent', 'throughput_MiBps', 'recent_throughput_MiBps',
+    'etf_seconds', 'recent_etf_seconds', 'efd', 'first_file', 'previous_most_recent_complete_file',
+    'most_recent_complete_file', 'current_file', 'providers', 'events'
+  )
+
+  def __init__(self, directory, postdata, sampled_at):
+    self.directory = directory
+    self.postdata = postdata
+    self.sampled_at = sampled_at
+    self.ready = False
+    self.complete = False
+    self.current_post_size_GiB = 0
+    self.remaining_post_size_GiB = None
+    self.progress_percent = None
+    self.throughput_MiBps = None
+    self.recent_throughput_MiBps = None
+    self.etf_seconds = None
+    self.recent_etf_seconds = None
+    self.efd = None
+    self.first_file = None
+    self.previous_most_recent_complete_file = None
+    self.most_recent_complete_file = None
+    self.current_file = None
+    self.providers = []
+    self.events = []
+
+  @property
+  def etf_string(self):
+    return format_duration(self.etf_seconds) if self.etf_seconds is not None else ""
+
+  @property
+  def recent_etf_string(self):
+    return format_duration(self.recent_etf_seconds) if self.recent_etf_seconds is not None else ""
+
+  @property
+  def efd_string(self):
+    return self.efd.strftime("%Y-%m-%d %H:%M") if self.efd is not None else None
+
+  @property
+  def most_recent_time_delta_string(self):
+    if self.complete or self.most_recent_complete_file is None:
+      return None
+    return format_minutes_seconds(abs(self.sampled_at - self.most_recent_complete_file.mtime))
+
+  def to_dict(self):
+    now = self.sampled_at
+    return {
+      'metadata': {
+        'postdata': self.postdata,
+        'smeshing': {}
+      },
+      'progress': {
+        'progress_percent': self.progress_percent,
+        'current_post_size_GiB': self.current_post_size_GiB,
+        'remaining_post_size_GiB': self.remaining_post_size_GiB,
+        'recent_throughput_MiBps': self.recent_throughput_MiBps,
+        'throughput_MiBps': self.throughput_MiBps,
+        'recent_etf_string': self.recent_etf_string,
+        'efd': self.efd_string
+      },
+      'files': {
+        'first': self.first_file.to_dict(now),
+        'previous_most_recent_complete': self.previous_most_recent_complete_file.to_dict(now),
+        'most_recent_complete': self.most_recent_complete_file.to_dict(now),
+        'current': self.current_file.to_dict(now)
+      },
+      'most_recent_time_delta_string': self.most_recent_time_delta_string,
+    }
+
+
+class PlotScanner:
+  __slots__ = (
+    'directory', 'num_providers', 'stall_seconds', 'throttle_percent', 'rate_window_seconds',
+    'postdata', 'providers', 'progress', '_files', '_range_starts', '_file_ranges', '_metadata_signature'
+  )
+
+  def __init__(self, directory, num_providers=1, stall_seconds=300, throttle_percent=50, rate_window_seconds=120, file_ranges=None):
+    if not os.path.isdir(directory):
+      raise PlotScanError("The provided directory does not exist.")
+    if not os.path.isfile(os.path.join(directory, "postdata_metadata.json")):
+      raise PlotScanError("The provided directory does not contain postdata_metadata.json.")
+    self.directory = directory
+    self.num_providers = len(file_ranges) if file_ranges else max(num_providers, 1)
+    self.stall_seconds = stall_seconds
+    self.throttle_percent = throttle_percent
+    self.rate_window_seconds = rate_window_seconds
+    self.progress = None
+    self._file_ranges = file_ranges
+    self._load_metadata()
+
+  def refresh(self, now=None):
+    if now is None:
+      now = time.time()
+    if self._read_metadata_signature() != self._metadata_signature:
+      self._load_metadata()
+    self._scan_files()
+    files = self._files
+
+    progress = PlotProgress(self.directory, self.postdata, now)
+    progress.current_post_size_GiB = sum(post_file.size for post_file in files.values()) / GiB
+    progress.providers = self.providers
+    for status, post_files in zip(self.providers, self._files_by_provider(files)):
+      for event in status.update(post_files, now, self.stall_seconds, self.throttle_percent, self.rate_window_seconds):
+        progress.events.append((status, event))
+    self._calculate_throughput(progress, files, now)
+    self.progress = progress
+    return progress
+
+  def _read_metadata_signature(self):
+    path = os.path.join(self.directory, "postdata_metadata.json")
+    try:
+      stat = os.stat(path)
+    except OSError as error:
+      raise PlotScanError(f"The {path} file is missing or unreadable: {error!r}")
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+  def _load_metadata(self):
+    # A new or rewritten metadata file means a new plot: every provider starts from scratch
+    self._metadata_signature = self._read_metadata_signature()
+    self.postdata = postdata_metadata(self.directory)
+    self.providers = [
+      ProviderStatus(index, file_range, self.postdata['max_file_size'])
+      for index, file_range in enumerate(self._file_ranges or provider_file_ranges(self.postdata, self.num_providers))
+    ]
+    self._range_starts = [status.from_file for status in self.providers]
+    self._files = {}
+
+  def _files_by_provider(self, files):
+    # Bucket every file once so a refresh stays O(files) however many providers there are
+    buckets = [[] for _ in self.providers]
+    for index, post_file in files.items():
+      provider = bisect.bisect_right(self._range_starts, index) - 1
+      if provider >= 0 and index <= self.providers[provider].to_file:
+        buckets[provider].append(post_file)
+    return buckets
+
+  def _scan_files(self):
+    max_file_size = self.postdata['max_file_size']
+    files = {}
+    for entry in os.scandir(self.directory):
+      match = postdata_bin_pattern.match(entry.name)
+      if not match:
+        continue
+      try:
+        if not entry.is_file():
+          continue
+        inode = entry.inode()
+        index = int(match.group(1))
+        cached = self._files.get(index)
+        # Complete files never change again, so they are only stat'ed once. A different
+        # inode means the directory was wiped and the file was plotted again.
+        if cached is not None and cached.size == max_file_size and cached.inode == inode:
+          files[index] = cached
+          continue
+        stat = entry.stat()
+      except FileNotFoundError:
+        continue
+      files[index] = PostFile(entry.path, stat.st_size, stat.st_mtime, inode)
+    # Plotting never deletes files, so a vanished one means the directory was wiped. The
+    # filesystem may hand the old inode numbers straight back, so start over completely.
+    if any(index not in files for index in self._files):
+      self._load_metadata()
+      return self._scan_files()
+    self._files = files
+
+  def _calculate_throughput(self, progress, files, now):
+    postdata = self.postdata
+    files_by_mod_time_desc = sorted(files.values(), key=lambda post_file: post_file.mtime, reverse=True)
+    complete_files = [post_file for post_file in files_by_mod_time_desc if post_file.size == postdata['max_file_size']]
+    if len(files_by_mod_time_desc) < 2 * self.num_providers or len(complete_files) < 2:
+      return
+
+    first_file = files_by_mod_time_desc[-1]
+    current_file = files_by_mod_time_desc[0]
+    most_recent_complete_file = complete_files[0]
+    progress.ready = True
+    progress.first_file = first_file
+    progress.previous_most_recent_complete_file = complete_files[1]
+    progress.most_recent_complete_file = most_recent_complete_file
+    progress.current_file = current_file
+
+    # Get the total size of the files in the directory except the first file in the list
+    total_size = sum(post_file.size for post_file in files_by_mod_time_desc[:-1])
+    first_time_diff = abs(current_file.mtime - first_file.mtime)
+    size_MiB = (total_size - first_file.size) / MiB
+    progress.throughput_MiBps = size_MiB / first_time_diff if first_time_diff else 0
+
+    if current_file is most_recent_complete_file:
+      progress.complete = True
+      progress.progress_percent = 100
+      progress.remaining_post_size_GiB = 0
+      progress.recent_throughput_MiBps = 0
+      return
+
+    time_between_most_recent_and_current = abs(current_file.mtime - most_recent_complete_file.mtime)
+    recent_size_MiB = current_file.size / MiB
+    if time_between_most_recent_and_current:
+      progress.recent_throughput_MiBps = recent_size_MiB / time_between_most_recent_and_current * self.num_providers
+    else:
+      progress.recent_throughput_MiBps = 0
+
+    progress.progress_percent = progress.current_post_size_GiB / postdata['total_post_size_GiB'] * 100
+
+    # estimated time to finish
+    progress.remaining_post_size_GiB = postdata['total_post_size_GiB'] - progress.current_post_size_GiB
+    if progress.throughput_MiBps:
+      progress.etf_seconds = progress.remaining_post_size_GiB / (progress.throughput_MiBps / 1024)
+    if progress.recent_throughput_MiBps:
+      progress.recent_etf_seconds = progress.remaining_post_size_GiB / (progress.recent_throughput_MiBps / 1024)
+      # estimated finish date
+      progress.efd = datetime.datetime.fromtimestamp(now) + datetime.timedelta(seconds=progress.recent_etf_seconds)
+
+
+class EventHooks:
+  __slots__ = ('command', 'url', 'debounce_seconds', '_last_events')
+
+  def __init__(self, command=None, url=None, debounce_seconds=900):
+    self.command = command
+    self.url = url
+    self.debounce_seconds = debounce_seconds
+    self._last_events = {}
+
+  def fire(self, scanner, status, event, now):
+    if not self.should_fire(scanner, status, event, now):
+      return False
+    self.deliver(provider_event(scanner, status, event, now))
+    return True
+
+  def should_fire(self, scanner, status, event, now):
+    # A provider changing state always fires; only repeats of its last event are debounced
+    key = (scanner.directory, status.provider)
+    last_event = self._last_events.get(key)
+    if last_event is not None and last_event[0] == event and now - last_event[1] < self.debounce_seconds:
+      return False
+    self._last_events[key] = (event, now)
+    return True
+
+  def deliver(self, data):
+    # Runs the command and posts to the URL for an event built by provider_event()
+    errors = []
+    if self.command:
+      env = dict(os.environ)
+      env['SMESHER_EVENT'] = data['event']
+      env['SMESHER_PROVIDER'] = str(data['provider'])
+      env['SMESHER_DIRECTORY'] = data['directory']
+      env['SMESHER_EVENT_JSON'] = json.dumps(data)
+      try:
+        subprocess.Popen(self.command, shell=True, env=env)
+      except OSError as error:
+        errors.append(f"Hook command failed: {error}")
+    if self.url:
+      try:
+        request = urllib.request.Request(url=self.url, method='POST')
+        request.add_header('Content-Type', 'application/json')
+        request.add_header('User-Agent', 'smesher-plot-speed')
+        urllib.request.urlopen(request, json.dumps(data).encode(), timeout=5).read()
+      except (urllib.error.URLError, OSError, ValueError) as error:
+        errors.append(f"Hook URL failed: {error}")
+    if errors:
+      raise PlotScanError('; '.join(errors))
+
+def provider_event(scanner, status, event, now):
+  return {
+    'event': event,
+    'time': datetime.datetime.fromtimestamp(now).isoformat(),
+    'directory': scanner.directory,
+    'node_md5': scanner.postdata['node_md5'],
+    'provider': status.provider,
+    'current_file': status.current_file,
+    'seconds_since_growth': status.seconds_since_growth,
+    'rate_MiBps': status.rate_MiBps,
+    'baseline_MiBps': status.baseline_MiBps,
+    'stall_seconds': scanner.stall_seconds,
+    'throttle_percent': scanner.throttle_percent
+  }
+
+def post_report(data):
+  request = urllib.request.Request(url=report_url, method='POST')
+  request.add_header('Content-Type', 'application/json')
+  request.add_header('User-Agent', 'smesher-plot-speed')
+  response = urllib.request.urlopen(request, json.dumps(data).encode())
+  _content = response.read()
+
+  if response.status == 200:
+    data['report'] = {
+      'sent': True
+    }
+  else:
+    data['report'] = {
+      'sent': False,
+      'status_code': response.status,
+      'reason': response.reason
+    }
+  return data